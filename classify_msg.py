@@ -1,23 +1,76 @@
 # classify_msg.py
 from __future__ import annotations
 
-import json
+import asyncio
 import os
+
+import httpx
+import orjson
 from pathlib import Path
 from typing import Any, Dict, List
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
-from normalize import load_profile, apply_replacements
+from normalize import DEFAULT_PROFILE, load_profile, apply_replacements
+from utils.llm_cache import LLMCache
+from utils.openai_batch import run_chat_batch
 
 
 LABELS = ["decision", "proposal", "question", "chitchat", "other"]
 
+# ミニバッチ分割の設定（環境変数で調整可能）
+SHARD_SIZE = int(os.getenv("CLASSIFY_SHARD_SIZE", "20"))
+CONCURRENCY = int(os.getenv("CLASSIFY_CONCURRENCY", "8"))
+
+# 1発言あたりの出力トークン上限（label/topic/reason で十分な余裕を見た値）
+TOKENS_PER_ITEM = 80
+TOKENS_SLACK = 128
+
+# これより短い発言はLLMに送らず chitchat 扱いにする
+MIN_CLASSIFY_CHARS = 6
+
+
+# 構造化出力のスキーマは固定なので、呼び出しごとに組み立てずモジュール定数にする
+CLASSIFY_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "classification",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "items": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "index": {"type": "integer"},
+                            "label": {"type": "string", "enum": LABELS},
+                            "topic": {"type": "string"},
+                            "reason": {"type": "string"},
+                        },
+                        "required": ["index", "label", "topic", "reason"],
+                        "additionalProperties": False,
+                    },
+                }
+            },
+            "required": ["items"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+def _shard_max_tokens(shard: List[Dict[str, Any]]) -> int:
+    # 正常系ではスキーマ境界で止まるので届かない上限。暴走生成時のテール遅延だけを抑える
+    return len(shard) * TOKENS_PER_ITEM + TOKENS_SLACK
+
 
 def _extract_json_text(s: str) -> str:
     s = (s or "").strip()
-    if not s:
+    # 構造化出力（json_schema）では常にここで確定し、部分文字列コピーを作らない
+    if s.startswith("{") and s.endswith("}"):
         return s
     start = s.find("{")
     end = s.rfind("}")
@@ -32,6 +85,7 @@ def classify_messages(
     profile_path: str,
     model: str,
     temperature: float,
+    batch: bool = False,
 ) -> None:
     load_dotenv()
     api_key = os.getenv("OPENAI_API_KEY", "").strip()
@@ -39,20 +93,14 @@ def classify_messages(
         raise SystemExit("OPENAI_API_KEY が未設定です（.env または環境変数に設定してください）")
 
     profile = load_profile(profile_path)
-    utterances: List[Dict[str, Any]] = json.load(open(input_path, encoding="utf-8"))
+    utterances: List[Dict[str, Any]] = orjson.loads(Path(input_path).read_bytes())
 
-    # 事前のワード補正（desc/ques 等の吸収）
-    enriched = []
-    for i, u in enumerate(utterances):
-        text = apply_replacements(str(u.get("text", "")), profile)
-        enriched.append(
-            {
-                "index": i,
-                "speaker": str(u.get("speaker", "")),
-                "timestamp": str(u.get("timestamp", "")),
-                "text": text,
-            }
-        )
+    # 事前のワード補正（desc/ques 等の吸収）。分類に使うのは text だけなので
+    # speaker/timestamp は持ち回らない（必要なら utterances[i] から直接読める）
+    enriched = [
+        {"index": i, "text": apply_replacements(str(u.get("text", "")), profile)}
+        for i, u in enumerate(utterances)
+    ]
 
     system_prompt = (
         "あなたは議事録を分類するAIです。\n"
@@ -67,65 +115,135 @@ def classify_messages(
         "回答は、必ず日本語で返すようにしてください。"
     )
 
-    user_prompt = (
-        "以下の配列の各要素について、index を保持したまま label/topic/reason を付与してください。\n"
-        "出力は JSON のみ。\n\n"
-        "入力:\n" + json.dumps(enriched, ensure_ascii=False, indent=2)
-    )
+    # 自明な雑談（定型句そのもの・極端に短い発言）はLLMに送らず決め打ちで分類する。
+    # chitchat_phrases を持たない既存の profile.json / lock ディレクトリでは
+    # 既定辞書にフォールバックする（ensure_profile_exists は既存ファイルを更新しないため）
+    fillers = frozenset(profile.get("chitchat_phrases") or DEFAULT_PROFILE["chitchat_phrases"])
+    trivial_items: List[Dict[str, Any]] = []
+    to_consider: List[Dict[str, Any]] = []
+    for u in enriched:
+        t = u["text"].strip()
+        if len(t) < MIN_CLASSIFY_CHARS or t.strip("。！？!?～ ") in fillers:
+            trivial_items.append({"index": u["index"], "label": "chitchat", "topic": "その他", "reason": "定型句・短文のため自動分類"})
+        else:
+            to_consider.append(u)
 
-    client = OpenAI(api_key=api_key)
+    # キャッシュ済みの発言はAPIに送らない（tune/eval の反復で同一入力が多いため）
+    cache = LLMCache()
+    key_by_index: Dict[int, str] = {}
+    cached_items: List[Dict[str, Any]] = []
+    to_classify: List[Dict[str, Any]] = []
+    for u in to_consider:
+        key = LLMCache.make_key(model, temperature, u["text"])
+        key_by_index[u["index"]] = key
+        hit = cache.get(key)
+        if hit is not None:
+            cached_items.append({"index": u["index"], **hit})
+        else:
+            to_classify.append(u)
 
-    response_format = {
-        "type": "json_schema",
-        "json_schema": {
-            "name": "classification",
-            "strict": True,
-            "schema": {
-                "type": "object",
-                "properties": {
-                    "items": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "index": {"type": "integer"},
-                                "label": {"type": "string", "enum": LABELS},
-                                "topic": {"type": "string"},
-                                "reason": {"type": "string"},
-                            },
-                            "required": ["index", "label", "topic", "reason"],
-                            "additionalProperties": False,
-                        },
-                    }
-                },
-                "required": ["items"],
-                "additionalProperties": False,
-            },
-        },
-    }
-
-    try:
-        resp = client.chat.completions.create(
-            model=model,
-            temperature=temperature,
-            messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
-            response_format=response_format,
+    def shard_messages(shard: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        # 1行1発言「<index>\t<text>」の密な形式。speaker/timestamp は分類に使わないので送らない
+        # 改行・タブ入りの発言は行境界を壊す（indexの取り違えを誘発する）ので空白に潰す。
+        # これは送信用の整形だけで、出力に使う _text_norm は元のまま
+        lines = "\n".join(
+            "{}\t{}".format(u["index"], u["text"].replace("\n", " ").replace("\t", " "))
+            for u in shard
         )
-        content = resp.choices[0].message.content or ""
-        obj = json.loads(_extract_json_text(content))
-    except TypeError:
-        # 古いSDK想定：デバッグ保存
-        resp = client.chat.completions.create(
-            model=model,
-            temperature=temperature,
-            messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+        user_prompt = (
+            "以下の各行は「index\\tテキスト」形式の発言です。\n"
+            "各行について、index を保持したまま label/topic/reason を付与してください。\n"
+            "出力は JSON のみ。\n\n"
+            "入力:\n" + lines
         )
-        content = resp.choices[0].message.content or ""
-        Path("./_debug").mkdir(parents=True, exist_ok=True)
-        Path("./_debug/last_classify_output.txt").write_text(content, encoding="utf-8")
-        obj = json.loads(_extract_json_text(content))
+        return [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}]
+
+    def parse_items(content: str) -> List[Dict[str, Any]]:
+        obj = orjson.loads(_extract_json_text(content))
+        return obj.get("items", []) if isinstance(obj, dict) else []
+
+    sem = asyncio.Semaphore(CONCURRENCY)
+
+    async def classify_shard(client: AsyncOpenAI, shard: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        messages = shard_messages(shard)
+
+        async with sem:
+            try:
+                resp = await client.chat.completions.create(
+                    model=model,
+                    temperature=temperature,
+                    messages=messages,
+                    response_format=CLASSIFY_RESPONSE_FORMAT,
+                    max_tokens=_shard_max_tokens(shard),
+                )
+                content = resp.choices[0].message.content or ""
+            except TypeError:
+                # 古いSDK想定：デバッグ保存
+                resp = await client.chat.completions.create(
+                    model=model,
+                    temperature=temperature,
+                    messages=messages,
+                    max_tokens=_shard_max_tokens(shard),
+                )
+                content = resp.choices[0].message.content or ""
+                if os.getenv("CLASSIFY_DEBUG"):
+                    Path("./_debug").mkdir(parents=True, exist_ok=True)
+                    Path("./_debug/last_classify_output.txt").write_text(content, encoding="utf-8")
+
+        return parse_items(content)
+
+    async def classify_all(shards: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        # 高並列時はデフォルトhttpxクライアントのコネクション上限がスループットの
+        # ボトルネックになるため、上限を広げたクライアントを明示的に渡す
+        if CONCURRENCY > 32:
+            http_client = httpx.AsyncClient(
+                timeout=60.0,
+                limits=httpx.Limits(max_connections=256, max_keepalive_connections=128),
+            )
+            client = AsyncOpenAI(api_key=api_key, http_client=http_client)
+        else:
+            client = AsyncOpenAI(api_key=api_key)
+        try:
+            results = await asyncio.gather(*(classify_shard(client, s) for s in shards))
+        finally:
+            # SDK経由で基底のhttpxクライアント（明示的に渡した場合も含む）を閉じる
+            await client.close()
+        return [it for items in results for it in items]
+
+    shards = [to_classify[i : i + SHARD_SIZE] for i in range(0, len(to_classify), SHARD_SIZE)]
+
+    if not shards:
+        fresh_items = []
+    elif batch:
+        # Batch API: 50%のコスト削減・別枠レート制限のかわりに最長24h（evalの一括実行向け）
+        sync_client = OpenAI(api_key=api_key)
+        reqs = [
+            {
+                "custom_id": f"classify-{n}",
+                "body": {
+                    "model": model,
+                    "temperature": temperature,
+                    "messages": shard_messages(s),
+                    "response_format": CLASSIFY_RESPONSE_FORMAT,
+                    "max_tokens": _shard_max_tokens(s),
+                },
+            }
+            for n, s in enumerate(shards)
+        ]
+        contents = run_chat_batch(sync_client, reqs)
+        fresh_items = [it for c in contents.values() for it in parse_items(c)]
+    else:
+        fresh_items = asyncio.run(classify_all(shards))
+
+    # 新規分をキャッシュへ書き戻し、キャッシュ済み分とマージ
+    for it in fresh_items:
+        if isinstance(it, dict) and "index" in it:
+            key = key_by_index.get(int(it["index"]))
+            if key:
+                cache.set(key, {"label": it.get("label"), "topic": it.get("topic"), "reason": it.get("reason")})
+    cache.close()
 
-    items = obj.get("items", []) if isinstance(obj, dict) else []
+    items = trivial_items + cached_items + fresh_items
     by_index = {int(it["index"]): it for it in items if isinstance(it, dict) and "index" in it}
 
     for i, u in enumerate(utterances):
@@ -135,8 +253,8 @@ def classify_messages(
         u["label_reason"] = (it or {}).get("reason", "")
         u["_text_norm"] = enriched[i]["text"]
 
+    # 機械可読の中間生成物なのでコンパクトなorjson出力で十分（C実装で直列化）
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(utterances, f, ensure_ascii=False, indent=2)
+    Path(output_path).write_bytes(orjson.dumps(utterances))
 
     print(f"[ok] 分類結果を保存: {output_path}")
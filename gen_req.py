@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import re
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List
 
@@ -10,6 +11,24 @@ from jinja2 import Environment, FileSystemLoader, select_autoescape
 
 from normalize import load_profile, apply_replacements
 
+try:
+    import ahocorasick  # pyahocorasick（任意依存）。無ければ線形スキャンにフォールバック
+except ImportError:
+    ahocorasick = None
+
+
+@lru_cache(maxsize=8)
+def jinja_env(dirpath: str) -> Environment:
+    """テンプレートディレクトリごとに Environment を1回だけ構築して使い回す。"""
+    return Environment(
+        loader=FileSystemLoader(dirpath),
+        autoescape=select_autoescape(),
+        trim_blocks=True,
+        lstrip_blocks=True,
+        cache_size=64,
+        auto_reload=False,
+    )
+
 
 def safe_write_text(path: Path, text: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -23,7 +42,43 @@ def safe_write_text(path: Path, text: str) -> None:
         print(f"[warn] {path} を更新できません（開かれている可能性）。別名で保存: {alt}")
 
 
+# 値側に topic_keys 自身も保持する（id再利用による取り違え防止。normalize.py の各キャッシュと同様）
+_TOPIC_AUTOMATON_CACHE: Dict[int, tuple] = {}
+
+
+def build_topic_automaton(topic_keys: List[List[Any]]):
+    """
+    キーワード→トピックの対応を Aho–Corasick オートマトンに畳み込む。
+    レコードごとに全トピック×全キーワードの部分文字列検索を回す代わりに、
+    本文1パスで判定できる。topic_keys ごとに1回だけ構築する。
+    """
+    if ahocorasick is None:
+        return None
+    cached = _TOPIC_AUTOMATON_CACHE.get(id(topic_keys))
+    if cached is not None:
+        return cached[1]
+
+    aut = ahocorasick.Automaton()
+    for prio, (key, kws) in enumerate(topic_keys):
+        for kw in kws:
+            # 同じキーワードが複数トピックにある場合は topic_keys の先頭側を優先
+            if kw not in aut:
+                aut.add_word(kw, (prio, str(key)))
+    if not len(aut):
+        # 語が無いと make_automaton() できず iter() が例外になる（topic_keys 無しの
+        # profile は従来どおり全件「その他」）。線形フォールバックに委ねる
+        aut = None
+    else:
+        aut.make_automaton()
+    _TOPIC_AUTOMATON_CACHE[id(topic_keys)] = (topic_keys, aut)
+    return aut
+
+
 def topic_of(text: str, topic_keys: List[List[Any]]) -> str:
+    aut = build_topic_automaton(topic_keys)
+    if aut is not None:
+        best = min((val for _, val in aut.iter(text)), default=None)
+        return best[1] if best is not None else "その他"
     for key, kws in topic_keys:
         if any(kw in text for kw in kws):
             return str(key)
@@ -37,8 +92,19 @@ def to_dt(ts: str):
         return datetime.min
 
 
+@lru_cache(maxsize=8)
+def _keywords_re(words: tuple):
+    """キーワード列を1本のコンパイル済み正規表現に畳み込む（語リストごとに1回）。"""
+    return re.compile("|".join(map(re.escape, words))) if words else None
+
+
+# 決定文の「除外」判定（FR/NFRループ共通）
+_EXCL_RE = re.compile("除外|範囲から除外")
+
+
 def is_tentative(text: str, tentative_words: List[str]) -> bool:
-    return any(w in text for w in tentative_words)
+    pat = _keywords_re(tuple(tentative_words))
+    return bool(pat and pat.search(text))
 
 
 def complete_decision_text(decision: Dict[str, Any], proposals_and_info: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -51,10 +117,11 @@ def complete_decision_text(decision: Dict[str, Any], proposals_and_info: List[Di
     return decision
 
 
+_NORM_RE = re.compile(r"[\s。、]+")
+
+
 def norm_text(t: str) -> str:
-    t = re.sub(r"\s+", "", t)
-    t = t.replace("。", "").replace("、", "")
-    return t
+    return _NORM_RE.sub("", t)
 
 
 def dedup(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -83,12 +150,18 @@ def generate_markdown(
     topic_keys = profile.get("topic_keys") or []
     tentative_words = profile.get("tentative_words") or []
 
+    # 1パスで 正規化・topic判定・timestampのparse・カテゴリ分配 を済ませる
+    fr: List[Dict[str, Any]] = []
+    nfr: List[Dict[str, Any]] = []
+    dec: List[Dict[str, Any]] = []
+    bucket = {"functional": fr, "nonfunctional": nfr, "decision": dec}
     for r in recs:
         r["statement"] = apply_replacements(str(r.get("statement", "")), profile)
-
-    fr = [r for r in recs if r.get("category") == "functional"]
-    nfr = [r for r in recs if r.get("category") == "nonfunctional"]
-    dec = [r for r in recs if r.get("category") == "decision"]
+        r["_topic"] = topic_of(r["statement"], topic_keys)
+        r["_ts_dt"] = to_dt((r.get("source") or {}).get("timestamp", ""))
+        b = bucket.get(r.get("category"))
+        if b is not None:
+            b.append(r)
 
     dec = [d for d in dec if not is_tentative(d.get("statement", ""), tentative_words)]
 
@@ -97,12 +170,11 @@ def generate_markdown(
     keep_others: List[Dict[str, Any]] = []
 
     for r in dec:
-        t = topic_of(r.get("statement", ""), topic_keys)
+        t = r["_topic"]
         if t == "その他":
             keep_others.append(r)
             continue
-        ts = (r.get("source") or {}).get("timestamp", "")
-        if (t not in latest_by_topic) or (to_dt(ts) > to_dt((latest_by_topic[t].get("source") or {}).get("timestamp", ""))):
+        if (t not in latest_by_topic) or (r["_ts_dt"] > latest_by_topic[t]["_ts_dt"]):
             latest_by_topic[t] = r
 
     dec = list(latest_by_topic.values()) + keep_others
@@ -115,7 +187,7 @@ def generate_markdown(
     kept_nfr: List[Dict[str, Any]] = []
 
     for r in fr:
-        topic = topic_of(r.get("statement", ""), topic_keys)
+        topic = r["_topic"]
         d = latest_by_topic.get(topic)
         if not d:
             kept_fr.append(r)
@@ -124,7 +196,7 @@ def generate_markdown(
         ds = d.get("statement", "")
         s = r.get("statement", "")
 
-        if ("除外" in ds) or ("範囲から除外" in ds):
+        if _EXCL_RE.search(ds):
             out_of_scope.append(r)
             continue
 
@@ -135,11 +207,11 @@ def generate_markdown(
         kept_fr.append(r)
 
     for r in nfr:
-        topic = topic_of(r.get("statement", ""), topic_keys)
+        topic = r["_topic"]
         d = latest_by_topic.get(topic)
         if d:
             ds = d.get("statement", "")
-            if ("除外" in ds) or ("範囲から除外" in ds):
+            if _EXCL_RE.search(ds):
                 out_of_scope.append(r)
                 continue
         kept_nfr.append(r)
@@ -150,19 +222,10 @@ def generate_markdown(
     nfr = dedup(nfr)
     dec = dedup(dec)
 
-    def to_dt_from_rec(r):
-        return to_dt((r.get("source") or {}).get("timestamp", ""))
-
-    dec = sorted(dec, key=to_dt_from_rec, reverse=True)
+    dec = sorted(dec, key=lambda r: r["_ts_dt"], reverse=True)
 
     tpl_path = Path(template_path)
-    env = Environment(
-        loader=FileSystemLoader(str(tpl_path.parent)),
-        autoescape=select_autoescape(),
-        trim_blocks=True,
-        lstrip_blocks=True,
-    )
-    tpl = env.get_template(tpl_path.name)
+    tpl = jinja_env(str(tpl_path.parent)).get_template(tpl_path.name)
 
     rendered = tpl.render(
         generated_at=datetime.now().strftime("%Y-%m-%d %H:%M"),
@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import argparse
-import json
 import os
 import shutil
 import hashlib
@@ -10,29 +9,46 @@ import time
 from datetime import datetime
 from pathlib import Path
 
+import orjson
 from dotenv import load_dotenv
 
 from classify_msg import classify_messages
 from normalize import normalize_records, ensure_profile_exists
 
 
-def sha256_file(path: str) -> str:
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
+# 同一ファイルを1回の実行内で何度もハッシュしないための (path, mtime, size) キャッシュ
+_SHA_CACHE: dict[tuple[str, float, int], str] = {}
 
 
-def write_json(path: str, data: dict) -> None:
+def sha256_file(path: str) -> str:
+    st = os.stat(path)
+    key = (path, st.st_mtime, st.st_size)
+    hit = _SHA_CACHE.get(key)
+    if hit is not None:
+        return hit
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):  # Py 3.11+: C層で大きなバッファを使って読む
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        else:
+            h = hashlib.sha256()
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+            digest = h.hexdigest()
+    _SHA_CACHE[key] = digest
+    return digest
+
+
+def write_json(path: str, data: dict, compact: bool = True) -> None:
+    """機械可読の中間成果物はcompact（空白なし）で書き、ファイルサイズを抑える。"""
     Path(path).parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    opts = orjson.OPT_NON_STR_KEYS
+    if not compact:
+        opts |= orjson.OPT_INDENT_2
+    Path(path).write_bytes(orjson.dumps(data, option=opts))
 
 
 def read_json(path: str) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return orjson.loads(Path(path).read_bytes())
 
 
 def fmt_sec(sec: float) -> str:
@@ -64,7 +80,7 @@ def copy_to_lock(lock_dir: str, profile_path: str, template_path: str, settings:
         "template_sha256": sha256_file(str(dst_template)),
         "settings": settings,
     }
-    write_json(str(lock / "lock_manifest.json"), manifest)
+    write_json(str(lock / "lock_manifest.json"), manifest, compact=False)  # 人が確認する凍結記録
     return manifest
 
 
@@ -97,6 +113,8 @@ def main() -> None:
     ap.add_argument("--lock-in", default="", help="eval時に使う lock ディレクトリ（例: ./lock/lock_ds1）")
     ap.add_argument("--template", default="", help="tune時に使用: 例 ./templates/spec.md.j2（eval時はlockのtemplateを使う）")
 
+    ap.add_argument("--batch", action="store_true", help="Batch APIで実行（50%%コスト減・最長24h。evalの一括実行向け）")
+
     ap.add_argument("--model", default=os.getenv("OPENAI_MODEL", "gpt-4o"))
     ap.add_argument("--temperature", type=float, default=float(os.getenv("OPENAI_TEMPERATURE", "0.2")))
 
@@ -153,6 +171,7 @@ def main() -> None:
         profile_path=profile_path,
         model=model,
         temperature=temperature,
+        batch=args.batch,
     )
     t1 = time.perf_counter()
 
@@ -163,6 +182,7 @@ def main() -> None:
         profile_path=profile_path,
         model=model,
         temperature=temperature,
+        batch=args.batch,
     )
     t2 = time.perf_counter()
 
@@ -1,16 +1,32 @@
 # normalize.py
 from __future__ import annotations
 
+import asyncio
+import inspect
 import json
 import os
 import re
 import hashlib
+
+import httpx
+import orjson
 from pathlib import Path
 from typing import Any, Dict, List
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+from utils.llm_cache import LLMCache
+
+try:
+    import ahocorasick  # pyahocorasick（任意依存）。無ければ線形スキャンにフォールバック
+except ImportError:
+    ahocorasick = None
 
+try:
+    import re2  # google-re2バインディング（任意依存）。DFA実行でバックトラックしない
+except ImportError:
+    re2 = None
 
 DEFAULT_PROFILE: Dict[str, Any] = {
     "text_replacements": [
@@ -24,6 +40,11 @@ DEFAULT_PROFILE: Dict[str, Any] = {
         "問題ありません", "助かります", "なるほど", "了解しました", "承知しました"
     ],
     "tentative_words": ["一旦", "暫定", "候補", "保留", "検討中", "仮"],
+    "chitchat_phrases": [
+        "はい", "はーい", "了解", "了解です", "了解しました", "承知しました",
+        "ありがとう", "ありがとうございます", "おはようございます", "お疲れ様です",
+        "よろしくお願いします", "なるほど"
+    ],
     "feature_map": {
         "ログイン": ["ログイン", "初期表示", "ボタン"],
         "通知": ["通知", "トースト"],
@@ -49,11 +70,13 @@ DEFAULT_PROFILE: Dict[str, Any] = {
 
 
 def sha256_file(path: str) -> str:
-    h = hashlib.sha256()
     with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
+        if hasattr(hashlib, "file_digest"):  # Py 3.11+: C層で大きなバッファを使って読む
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
             h.update(chunk)
-    return h.hexdigest()
+        return h.hexdigest()
 
 
 def ensure_profile_exists(profile_path: str) -> None:
@@ -64,47 +87,287 @@ def ensure_profile_exists(profile_path: str) -> None:
     p.write_text(json.dumps(DEFAULT_PROFILE, ensure_ascii=False, indent=2), encoding="utf-8")
 
 
+# load_profile 時に計算したダイジェスト（同じファイルを読み直して再ハッシュしないため）
+_PROFILE_DIGESTS: Dict[str, str] = {}
+
+
 def load_profile(profile_path: str) -> Dict[str, Any]:
     ensure_profile_exists(profile_path)
-    return json.loads(Path(profile_path).read_text(encoding="utf-8"))
+    data = Path(profile_path).read_bytes()
+    _PROFILE_DIGESTS[str(profile_path)] = hashlib.sha256(data).hexdigest()
+    return json.loads(data)
 
 
-def apply_replacements(text: str, profile: Dict[str, Any]) -> str:
-    s = text
-    for r in profile.get("text_replacements", []):
+def profile_digest(profile_path: str) -> str:
+    return _PROFILE_DIGESTS.get(str(profile_path)) or sha256_file(profile_path)
+
+
+# id(profile) をキーにする各キャッシュは、値側に profile 自身も保持する。
+# 参照を残さないと profile がGCされた後に同じアドレスへ別のdictが割り当てられ、
+# 前の profile のコンパイル結果を受け取ってしまう（id再利用による取り違え）
+_REPLACEMENT_CACHE: Dict[int, tuple] = {}
+
+
+def compile_replacements(profile: Dict[str, Any]) -> tuple:
+    """
+    text_replacements 全体を名前付きグループで1本の正規表現にまとめる。
+    発言ごとにパターン数ぶん re.sub を回す代わりに、1パスで置換できる。
+    """
+    cached = _REPLACEMENT_CACHE.get(id(profile))
+    if cached is not None:
+        return cached[1]
+
+    parts: List[str] = []
+    table: Dict[str, str] = {}
+    for i, r in enumerate(profile.get("text_replacements", [])):
+        pat = r.get("pattern", "")
+        if not pat:
+            continue
         try:
-            s = re.sub(r.get("pattern", ""), r.get("replace", ""), s, flags=re.IGNORECASE)
+            re.compile(pat)
         except re.error:
             continue
-    return s
+        name = f"r{i}"
+        parts.append(f"(?P<{name}>{pat})")
+        table[name] = r.get("replace", "")
 
-
-def is_non_requirement(text: str, profile: Dict[str, Any]) -> bool:
-    return any(p in text for p in profile.get("non_requirement_phrases", []))
+    pattern = re.compile("|".join(parts), re.IGNORECASE) if parts else None
+    _REPLACEMENT_CACHE[id(profile)] = (profile, (pattern, table))
+    return pattern, table
 
 
-def guess_feature(text: str, profile: Dict[str, Any]) -> str:
+def apply_replacements(text: str, profile: Dict[str, Any]) -> str:
+    pattern, table = compile_replacements(profile)
+    if pattern is None:
+        return text
+    return pattern.sub(lambda m: table[m.lastgroup], text)
+
+
+_PROFILE_AUTOMATON_CACHE: Dict[int, tuple] = {}
+
+
+def build_profile_automaton(profile: Dict[str, Any]):
+    """
+    non_requirement_phrases と feature_map を1つの Aho–Corasick オートマトンに
+    畳み込む。行ごとに全フレーズ・全キーワードの部分文字列検索を回す代わりに、
+    本文1パスで (非要件か, feature) を判定できる。profile ごとに1回だけ構築。
+    """
+    if ahocorasick is None:
+        return None
+    cached = _PROFILE_AUTOMATON_CACHE.get(id(profile))
+    if cached is not None:
+        return cached[1]
+
+    aut = ahocorasick.Automaton()
+    # 非要件フレーズを先に登録（feature キーワードと重複した場合は非要件を優先）
+    for p in profile.get("non_requirement_phrases", []):
+        if p not in aut:
+            aut.add_word(p, ("nonreq", None, -1))
+    for prio, (feat, kws) in enumerate((profile.get("feature_map") or {}).items()):
+        for kw in kws:
+            if kw not in aut:
+                aut.add_word(kw, ("feat", feat, prio))
+    if not len(aut):
+        # 語が1つも無いと make_automaton() できず iter() が例外になるため、
+        # 正規表現/線形スキャンのフォールバックに委ねる
+        aut = None
+    else:
+        aut.make_automaton()
+    _PROFILE_AUTOMATON_CACHE[id(profile)] = (profile, aut)
+    return aut
+
+
+_PROFILE_REGEX_CACHE: Dict[int, tuple] = {}
+
+
+def compile_profile_keywords(profile: Dict[str, Any]) -> tuple:
+    """
+    non_requirement_phrases と feature_map を名前付きグループの交代1本に
+    まとめる（オートマトンが無い環境向けのフォールバック）。re2 があれば
+    DFA実行になり、選択肢の数に依らず線形時間で走査できる。
+    """
+    cached = _PROFILE_REGEX_CACHE.get(id(profile))
+    if cached is not None:
+        return cached[1]
+
+    parts: List[str] = []
+    table: Dict[str, tuple] = {}
+    phrases = [re.escape(p) for p in profile.get("non_requirement_phrases", []) if p]
+    if phrases:
+        # 非要件フレーズを先頭に置き、featureキーワードと重複した場合も非要件側で拾う
+        parts.append("(?P<nonreq>" + "|".join(phrases) + ")")
+    for prio, (feat, kws) in enumerate((profile.get("feature_map") or {}).items()):
+        kws = [re.escape(k) for k in kws if k]
+        if not kws:
+            continue
+        name = f"f{prio}"
+        parts.append(f"(?P<{name}>" + "|".join(kws) + ")")
+        table[name] = (prio, feat)
+
+    pattern = (re2 or re).compile("|".join(parts)) if parts else None
+    _PROFILE_REGEX_CACHE[id(profile)] = (profile, (pattern, table))
+    return pattern, table
+
+
+def scan_profile_keywords(text: str, profile: Dict[str, Any]) -> tuple:
+    """(非要件か, feature) を返す。オートマトンがあれば本文1パスで判定する。"""
+    aut = build_profile_automaton(profile)
+    if aut is not None:
+        nonreq = False
+        best = None  # (feature_mapの定義順, feature)
+        for _, (kind, val, prio) in aut.iter(text):
+            if kind == "nonreq":
+                nonreq = True
+            elif best is None or prio < best[0]:
+                best = (prio, val)
+        return nonreq, (best[1] if best is not None else "その他")
+
+    pattern, table = compile_profile_keywords(profile)
+    if pattern is not None:
+        nonreq = False
+        best = None
+        for m in pattern.finditer(text):
+            g = m.lastgroup
+            if g == "nonreq":
+                nonreq = True
+            else:
+                ent = table[g]
+                if best is None or ent[0] < best[0]:
+                    best = ent
+        return nonreq, (best[1] if best is not None else "その他")
+
+    nonreq = any(p in text for p in profile.get("non_requirement_phrases", []))
     fmap: Dict[str, List[str]] = profile.get("feature_map", {}) or {}
     for feat, kws in fmap.items():
         if any(kw in text for kw in kws):
-            return feat
-    return "その他"
+            return nonreq, feat
+    return nonreq, "その他"
+
+
+def is_non_requirement(text: str, profile: Dict[str, Any]) -> bool:
+    return scan_profile_keywords(text, profile)[0]
+
+
+def guess_feature(text: str, profile: Dict[str, Any]) -> str:
+    return scan_profile_keywords(text, profile)[1]
+
+
+def _parse_llm_json(s: str) -> Dict[str, Any]:
+    """
+    LLM応答をJSONとして解釈する。構造化出力（json_schema）なら素のJSONなので
+    そのままorjsonでデコードでき、コードフェンス付き・前後にテキストが混ざった
+    応答だけ波括弧スライスにフォールバックする。失敗時は空dict。
+    """
+    s = (s or "").strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+    try:
+        return orjson.loads(s)
+    except orjson.JSONDecodeError:
+        i, j = s.find("{"), s.rfind("}")
+        if i != -1 and j > i:
+            try:
+                return orjson.loads(s[i : j + 1])
+            except orjson.JSONDecodeError:
+                return {}
+        return {}
+
+
+# 1回のLLM呼び出しにまとめる行数（行マーシャリングのスイートスポットは8〜16程度）
+NORMALIZE_BATCH_SIZE = int(os.getenv("NORMALIZE_BATCH_SIZE", "12"))
+
+# チャンクを同時に投げる並列数（レート制限に合わせて調整）
+NORMALIZE_CONCURRENCY = int(os.getenv("NORMALIZE_CONCURRENCY", "8"))
+
+NORMALIZE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "normalized_req",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "statement": {"type": "string"},
+                "acceptance_criteria": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["statement", "acceptance_criteria"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+# 複数行をまとめて変換するためのスキーマ（results は入力と同順の配列）
+NORMALIZE_BATCH_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "normalized_reqs",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "statement": {"type": "string"},
+                            "acceptance_criteria": {"type": "array", "items": {"type": "string"}},
+                        },
+                        "required": ["statement", "acceptance_criteria"],
+                        "additionalProperties": False,
+                    },
+                }
+            },
+            "required": ["results"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+_NORMALIZE_SYSTEM = (
+    "あなたは要件定義のテクニカルライターです。"
+    "口語の発話を、仕様書調の定義文とGherkin風の受け入れ条件に変換します。"
+    "数値・主体・条件を明確化し、指定スキーマのJSONのみを返してください。"
+)
 
 
-def next_id(seq: List[Dict[str, Any]], prefix: str) -> str:
-    n = len([x for x in seq if str(x.get("id", "")).startswith(prefix)]) + 1
-    return f"{prefix}-{n:03d}"
+# クライアントごとのSDK能力判定（response_format対応可否）のキャッシュ
+_RF_SUPPORT_CACHE: Dict[int, tuple] = {}
 
 
-def _extract_json_text(s: str) -> str:
-    s = (s or "").strip()
-    if not s:
-        return s
-    start = s.find("{")
-    end = s.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        return s[start : end + 1]
-    return s
+def supports_response_format(client: Any) -> bool:
+    """
+    SDKの create() が response_format 引数を受けるかを署名から一度だけ判定する。
+    TypeError を捕まえて呼び直す方式だと、古いSDKでは失敗する1回目の呼び出しが
+    まるごと無駄なAPI往復になるため、事前に分岐を確定させる。
+    """
+    cached = _RF_SUPPORT_CACHE.get(id(client))
+    if cached is not None:
+        return cached[1]
+    try:
+        params = inspect.signature(client.chat.completions.create).parameters
+        ok = "response_format" in params or any(
+            p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values()
+        )
+    except (TypeError, ValueError):
+        ok = True  # 署名が取れないラッパーは現行SDK相当とみなす
+    _RF_SUPPORT_CACHE[id(client)] = (client, ok)
+    return ok
+
+
+def normalize_messages(category: str, feature: str, utterance: str) -> List[Dict[str, str]]:
+    usr = f"category: {category}\nfeature: {feature}\nutterance: {utterance}\n"
+    return [{"role": "system", "content": _NORMALIZE_SYSTEM}, {"role": "user", "content": usr}]
+
+
+def normalize_batch_messages(items: List[tuple]) -> List[Dict[str, str]]:
+    """items: (category, feature, utterance) の列。番号付きの行にまとめて1回で変換させる。"""
+    sys = _NORMALIZE_SYSTEM + "複数行の入力を同じ順序で results 配列に変換してください。"
+    # 改行入りの発話は行境界を壊し、results の行対応がずれるので空白に潰して送る
+    usr = "\n".join(
+        "[{}] category={} feature={} utterance={}".format(i, cat, feature, text.replace("\n", " "))
+        for i, (cat, feature, text) in enumerate(items)
+    )
+    return [{"role": "system", "content": sys}, {"role": "user", "content": usr}]
 
 
 def llm_normalize(
@@ -115,50 +378,117 @@ def llm_normalize(
     feature: str,
     utterance: str,
 ) -> Dict[str, Any]:
-    sys = (
-        "あなたは要件定義のテクニカルライターです。"
-        "口語の発話を、仕様書調の定義文とGherkin風の受け入れ条件に変換します。"
-        "数値・主体・条件を明確化し、指定スキーマのJSONのみを返してください。"
-    )
-    usr = f"category: {category}\nfeature: {feature}\nutterance: {utterance}\n"
+    messages = normalize_messages(category, feature, utterance)
 
-    response_format = {
-        "type": "json_schema",
-        "json_schema": {
-            "name": "normalized_req",
-            "strict": True,
-            "schema": {
-                "type": "object",
-                "properties": {
-                    "statement": {"type": "string"},
-                    "acceptance_criteria": {"type": "array", "items": {"type": "string"}},
-                },
-                "required": ["statement", "acceptance_criteria"],
-                "additionalProperties": False,
-            },
-        },
-    }
-
-    try:
+    if supports_response_format(client):
         r = client.chat.completions.create(
             model=model,
             temperature=temperature,
-            messages=[{"role": "system", "content": sys}, {"role": "user", "content": usr}],
-            response_format=response_format,
+            messages=messages,
+            response_format=NORMALIZE_RESPONSE_FORMAT,
         )
         content = r.choices[0].message.content or ""
-        return json.loads(_extract_json_text(content))
-    except TypeError:
+        return _parse_llm_json(content)
+
+    r = client.chat.completions.create(
+        model=model,
+        temperature=temperature,
+        messages=messages,
+    )
+    content = r.choices[0].message.content or ""
+    return _parse_llm_json(content) or {"statement": utterance, "acceptance_criteria": []}
+
+
+# 決定的に変換できる定型発話のパターン（LLMを介さない特殊化パス）
+_SECONDS_RE = re.compile(r"(\d+)\s*秒以内")
+_RETENTION_RE = re.compile(r"(\d+)\s*日")
+
+
+def try_template(category: str, feature: str, text: str) -> Dict[str, Any] | None:
+    """
+    数値条件つきの定型発話はルールで statement / acceptance_criteria を生成し、
+    LLM呼び出しを丸ごと省く。該当しなければ None を返してLLMに委ねる。
+    """
+    if feature == "性能":
+        m = _SECONDS_RE.search(text)
+        if m:
+            n = m.group(1)
+            return {
+                "statement": f"対象画面の応答時間は{n}秒以内であること。",
+                "acceptance_criteria": [
+                    f"Given 通常負荷の状態 When 対象の操作を実行する Then 応答時間は{n}秒以内である"
+                ],
+            }
+    if feature == "保持":
+        m = _RETENTION_RE.search(text)
+        if m:
+            n = m.group(1)
+            return {
+                "statement": f"ログの保持期間は{n}日間とすること。",
+                "acceptance_criteria": [
+                    f"Given 記録済みのログ When {n}日を経過する Then 当該ログは保持対象から除外される"
+                ],
+            }
+    return None
+
+
+def _parse_batch_results(content: str, n: int) -> List[Dict[str, Any]]:
+    obj = _parse_llm_json(content)
+    results = obj.get("results", []) if isinstance(obj, dict) else []
+    # 行数が合わない場合は空dictで埋め、呼び出し側の元発話フォールバックに任せる
+    return (results + [{}] * n)[:n]
+
+
+def llm_normalize_batch(
+    client: OpenAI,
+    model: str,
+    temperature: float,
+    items: List[tuple],
+) -> List[Dict[str, Any]]:
+    """(category, feature, utterance) の列を1回のAPI呼び出しでまとめて変換する。"""
+    messages = normalize_batch_messages(items)
+    if supports_response_format(client):
         r = client.chat.completions.create(
             model=model,
             temperature=temperature,
-            messages=[{"role": "system", "content": sys}, {"role": "user", "content": usr}],
+            messages=messages,
+            response_format=NORMALIZE_BATCH_RESPONSE_FORMAT,
         )
-        content = r.choices[0].message.content or ""
-        m = re.search(r"\{.*\}", content, re.DOTALL)
-        if not m:
-            return {"statement": utterance, "acceptance_criteria": []}
-        return json.loads(_extract_json_text(m.group(0)))
+    else:
+        r = client.chat.completions.create(
+            model=model,
+            temperature=temperature,
+            messages=messages,
+        )
+    content = r.choices[0].message.content or ""
+    return _parse_batch_results(content, len(items))
+
+
+async def llm_normalize_batch_async(
+    client: AsyncOpenAI,
+    model: str,
+    temperature: float,
+    items: List[tuple],
+    sem: asyncio.Semaphore,
+) -> List[Dict[str, Any]]:
+    """llm_normalize_batch の非同期版。セマフォで同時実行数を抑える。"""
+    messages = normalize_batch_messages(items)
+    async with sem:
+        if supports_response_format(client):
+            r = await client.chat.completions.create(
+                model=model,
+                temperature=temperature,
+                messages=messages,
+                response_format=NORMALIZE_BATCH_RESPONSE_FORMAT,
+            )
+        else:
+            r = await client.chat.completions.create(
+                model=model,
+                temperature=temperature,
+                messages=messages,
+            )
+    content = r.choices[0].message.content or ""
+    return _parse_batch_results(content, len(items))
 
 
 def normalize_records(
@@ -167,6 +497,7 @@ def normalize_records(
     profile_path: str,
     model: str,
     temperature: float,
+    batch: bool = False,
 ) -> Dict[str, Any]:
     load_dotenv()
     api_key = os.getenv("OPENAI_API_KEY", "").strip()
@@ -174,72 +505,168 @@ def normalize_records(
         raise SystemExit("OPENAI_API_KEY が未設定です（.env または環境変数に設定してください）")
 
     profile = load_profile(profile_path)
-    client = OpenAI(api_key=api_key)
 
-    rows: List[Dict[str, Any]] = json.load(open(classified_path, encoding="utf-8"))
+    # 入力は1回だけ読み、同じバイト列からハッシュとパースの両方を行う
+    # （meta に入れるダイジェストで結局全バイトが要るため、二度読みより速い）
+    data = Path(classified_path).read_bytes()
+    input_sha = hashlib.sha256(data).hexdigest()
+    rows: List[Dict[str, Any]] = orjson.loads(data)
+    del data
     out: List[Dict[str, Any]] = []
+    pending: List[tuple] = []
+    buckets: Dict[str, List[Dict[str, Any]]] = {"functional": [], "nonfunctional": [], "decision": []}
 
-    nonfunc = set(profile.get("nonfunctional_features", []))
+    # プロファイル由来のコレクションと置換パターンは行ループの外で確定させる
+    allowed = frozenset(("decision", "proposal", "other", "question", "chitchat"))
+    nonfunc = frozenset(profile.get("nonfunctional_features", []))
+    rep_pattern, rep_table = compile_replacements(profile)
 
     for d in rows:
-        label = d.get("label")
-        if label not in ("decision", "proposal", "other", "question", "chitchat"):
+        # 分類器がキーを保証しているので直接アクセスし、欠損行だけ例外で弾く
+        try:
+            label = d["label"]
+            text_raw = d["text"]
+        except KeyError:
+            continue
+        if label not in allowed:
             continue
 
-        text_raw = str(d.get("text", "")).strip()
-        text = apply_replacements(text_raw, profile)
+        # text は通常 str なので、その場合は str() 経由の再構築を省く
+        text_raw = text_raw.strip() if isinstance(text_raw, str) else str(text_raw).strip()
+        text = rep_pattern.sub(lambda m: rep_table[m.lastgroup], text_raw) if rep_pattern is not None else text_raw
 
-        if label == "chitchat" or is_non_requirement(text, profile):
+        nonreq, feature = scan_profile_keywords(text, profile)
+        if label == "chitchat" or nonreq:
             continue
-
-        feature = guess_feature(text, profile)
         cat = "functional" if feature not in nonfunc else "nonfunctional"
         if label == "decision":
             cat = "decision"
 
-        norm = llm_normalize(client, model, temperature, cat, feature, text)
-
         rec = {
             "id": "",
             "feature": feature,
             "category": cat,
-            "statement": norm.get("statement", text),
-            "acceptance_criteria": norm.get("acceptance_criteria", []),
+            "statement": text,
+            "acceptance_criteria": [],
             "priority": "Must" if label == "decision" else "Should",
             "status": "決定" if label == "decision" else ("検討中" if label in ("proposal", "question") else "情報"),
-            "source": {"speaker": d.get("speaker", ""), "timestamp": d.get("timestamp", "")},
-            "rationale": d.get("label_reason", ""),
+            "source": {"speaker": d.get("speaker") or "", "timestamp": d.get("timestamp") or ""},
+            "rationale": d.get("label_reason") or "",
             "dependencies": [],
             "supersedes": [],
             "tags": [d.get("topic", "その他")],
         }
         out.append(rec)
-
-    fr = [x for x in out if x["category"] == "functional"]
-    nfr = [x for x in out if x["category"] == "nonfunctional"]
-    dec = [x for x in out if x["category"] == "decision"]
-
-    for x in fr:
-        x["id"] = next_id(fr, "FR")
-    for x in nfr:
-        x["id"] = next_id(nfr, "NFR")
-    for x in dec:
-        x["id"] = next_id(dec, "DEC")
+        buckets[cat].append(rec)
+        pending.append((rec, cat, feature, text))
+
+    # キャッシュ済みの行はLLMに送らない（分類と同じSQLiteキャッシュを共有）
+    llm_cache = LLMCache()
+    misses: List[tuple] = []
+    for item in pending:
+        rec, cat, feature, text = item
+        # 定型発話はルールで確定し、キャッシュ・LLMとも素通しにする
+        templated = try_template(cat, feature, text)
+        if templated is not None:
+            rec["statement"] = templated["statement"]
+            rec["acceptance_criteria"] = templated["acceptance_criteria"]
+            continue
+        key = LLMCache.make_key(model, temperature, f"{cat}|{feature}|{text}")
+        hit = llm_cache.get(key)
+        if hit is not None:
+            rec["statement"] = hit.get("statement", text)
+            rec["acceptance_criteria"] = hit.get("acceptance_criteria", [])
+        else:
+            misses.append((key, item))
+
+    # NORMALIZE_BATCH_SIZE 行ずつ1回のLLM呼び出しにまとめてRTTを償却する
+    chunks = [misses[i : i + NORMALIZE_BATCH_SIZE] for i in range(0, len(misses), NORMALIZE_BATCH_SIZE)]
+
+    def fill(chunk: List[tuple], results: List[Dict[str, Any]]) -> None:
+        for (key, (rec, cat, feature, text)), norm in zip(chunk, results):
+            if isinstance(norm, dict) and norm:
+                rec["statement"] = norm.get("statement", text)
+                rec["acceptance_criteria"] = norm.get("acceptance_criteria", [])
+                llm_cache.set(key, {"statement": rec["statement"], "acceptance_criteria": rec["acceptance_criteria"]})
+
+    if batch and chunks:
+        # Batch API: 50%のコスト削減・別枠レート制限のかわりに最長24h（evalの一括実行向け）
+        from utils.openai_batch import run_chat_batch
+
+        # アップロード＋ポーリングで同一ホストに繰り返しアクセスするので、
+        # コネクション上限を明示したクライアントを共有してTLS再接続を避ける
+        http = httpx.Client(
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=64),
+        )
+        client = OpenAI(api_key=api_key, http_client=http)
+        try:
+            reqs = [
+                {
+                    "custom_id": f"norm-{n}",
+                    "body": {
+                        "model": model,
+                        "temperature": temperature,
+                        "messages": normalize_batch_messages([(cat, feature, text) for key, (rec, cat, feature, text) in chunk]),
+                        "response_format": NORMALIZE_BATCH_RESPONSE_FORMAT,
+                    },
+                }
+                for n, chunk in enumerate(chunks)
+            ]
+            contents = run_chat_batch(client, reqs)
+            for n, chunk in enumerate(chunks):
+                fill(chunk, _parse_batch_results(contents.get(f"norm-{n}", ""), len(chunk)))
+        finally:
+            http.close()
+    elif chunks:
+        # 各チャンクは独立なので、セマフォ付きで並列に投げてI/O待ちを重ねる
+        async def run_all() -> List[List[Dict[str, Any]]]:
+            # 全チャンクで同じコネクションプールを共有してTCP+TLSの再接続を避ける
+            http = httpx.AsyncClient(
+                timeout=60.0,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=64),
+            )
+            aclient = AsyncOpenAI(api_key=api_key, http_client=http)
+            sem = asyncio.Semaphore(NORMALIZE_CONCURRENCY)
+            tasks = [
+                llm_normalize_batch_async(
+                    aclient, model, temperature,
+                    [(cat, feature, text) for key, (rec, cat, feature, text) in chunk], sem,
+                )
+                for chunk in chunks
+            ]
+            try:
+                return await asyncio.gather(*tasks)
+            finally:
+                await http.aclose()
+
+        for chunk, results in zip(chunks, asyncio.run(run_all())):
+            fill(chunk, results)
+
+    llm_cache.close()
+
+    fr, nfr, dec = buckets["functional"], buckets["nonfunctional"], buckets["decision"]
+
+    for i, x in enumerate(fr, 1):
+        x["id"] = f"FR-{i:03d}"
+    for i, x in enumerate(nfr, 1):
+        x["id"] = f"NFR-{i:03d}"
+    for i, x in enumerate(dec, 1):
+        x["id"] = f"DEC-{i:03d}"
 
     result = {
         "meta": {
-            "input_sha256": sha256_file(classified_path),
+            "input_sha256": input_sha,
             "model": model,
             "temperature": temperature,
             "profile_path": profile_path,
-            "profile_sha256": sha256_file(profile_path),
+            "profile_sha256": profile_digest(profile_path),
         },
         "records": out,
     }
 
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    Path(output_path).write_bytes(orjson.dumps(result))
 
     print(f"[ok] 正規化要件を出力: {output_path}")
     return result
@@ -1,7 +1,49 @@
-import json, re
-
-def extract_json_array(text: str):
-    m = re.search(r'\[\s*\{.*?\}\s*\]', text, re.DOTALL)
-    if not m:
-        raise ValueError("JSON配列を抽出できませんでした。")
-    return json.loads(m.group(0))
\ No newline at end of file
+import orjson
+
+
+def _find_json_array_span(s: str):
+    """
+    最初の「{ を含む対応の取れた [...]」の範囲 (start, end) を返す。
+    正規表現の遅延マッチ（バックトラック）を避け、括弧の深さと文字列状態を
+    追いながら1パスで走査する。見つからなければ None。
+    """
+    start = s.find("[")
+    while start != -1:
+        depth = 0
+        in_string = False
+        escaped = False
+        has_obj = False
+        for i in range(start, len(s)):
+            c = s[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif c == "\\":
+                    escaped = True
+                elif c == '"':
+                    in_string = False
+                continue
+            if c == '"':
+                in_string = True
+            elif c == "{":
+                has_obj = True
+                depth += 1
+            elif c == "}":
+                depth -= 1
+            elif c == "[":
+                depth += 1
+            elif c == "]":
+                depth -= 1
+                if depth == 0:
+                    if has_obj:
+                        return start, i
+                    break  # オブジェクトを含まない配列は読み飛ばして次の [ へ
+        start = s.find("[", start + 1)
+    return None
+
+
+def extract_json_array(text: str):
+    span = _find_json_array_span(text)
+    if span is None:
+        raise ValueError("JSON配列を抽出できませんでした。")
+    return orjson.loads(text[span[0] : span[1] + 1])
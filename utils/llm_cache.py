@@ -0,0 +1,41 @@
+# utils/llm_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Optional
+
+# tune/eval の試行錯誤で同一入力を何度もAPIに投げないための永続キャッシュ
+DEFAULT_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./.llm_cache.sqlite3")
+
+
+class LLMCache:
+    """
+    (model, temperature, テキスト) のハッシュをキーに LLM 応答を保存する SQLite キャッシュ。
+    temperature もキーに含めるため、temperature=0 に固定すればキャッシュは意味的に安全。
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH) -> None:
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT)")
+
+    @staticmethod
+    def make_key(model: str, temperature: float, text: str) -> str:
+        raw = f"{model}|{temperature}|{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+            (key, json.dumps(value, ensure_ascii=False)),
+        )
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()